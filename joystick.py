@@ -2,31 +2,17 @@
 []
 # Created by Tueftler.py
 
-import machine, os, asyncio
+import machine, os, json, asyncio
+from micropython import const
 
-@micropython.native
-def find_file(path="", first_line="# Calibration (will be automatically written)", file_type=".py"):
-    """
-    Recursively search for the first Python file that starts with a specific line.
-
-    Args:
-        path (str): Directory to start searching from.
-        first_line (str): Line that must match the first line of the file.
-        file_type (str): File ending of searched file, if you don't want this then only use a period for all files to be searched.'
+# Midpoint of the 16-bit ADC range and the percent scale, inlined by the
+# compiler at the call sites.
+_MID_RAW = const(32767)
+_PCT = const(100)
 
-    Returns:
-        str: Path to the matching file, or None if not found.
-    """
-    for entry in os.listdir(path):
-        newpath = path + "/" + entry
-        if entry.endswith(file_type):
-            with open(newpath, "r") as file:
-                if file.readline().strip() == first_line:
-                    return newpath
-        if os.stat(newpath)[0] & 0x4000:
-            return_val = find_file(newpath)
-            if return_val:
-                return return_val
+# Calibration can only be stored when running from the plain .py source;
+# a precompiled .mpy has no second line to rewrite.
+_THIS_FILE = __file__ if __file__.endswith(".py") else None
 
 class Joystick:
     """
@@ -47,21 +33,43 @@ class Joystick:
         """
         self.a1 = machine.ADC(a1)
         self.a2 = machine.ADC(a2)
+        self._r1 = self.a1.read_u16
+        self._r2 = self.a2.read_u16
         self.btn = machine.Pin(button_pin, machine.Pin.IN, machine.Pin.PULL_UP)
+        self._btn_flag = asyncio.ThreadSafeFlag()
+        self.btn.irq(
+            trigger=machine.Pin.IRQ_FALLING | machine.Pin.IRQ_RISING,
+            handler=lambda pin: self._btn_flag.set(),
+        )
         self.samples = samples
+        # Power-of-two sample counts let axis_reader average with a shift
+        # instead of a divide.
+        self._samp_shift = {1: 0, 2: 1, 4: 2, 8: 3}.get(samples, -1)
         self.deadzone = deadzone
         self.at = async_timeout
-        self.file = find_file()
-        if not self.file:
-            raise OSError("This file couldn't be found in the filesystem")
-
-        with open(self.file, "r") as file:
-            file.readline()
-            raw_data = file.readline().strip()
+        self._idle_polls = 0
+        self._states = [["button", 0], ["up", 0], ["down", 0], ["right", 0], ["left", 0]]
+        self._state_buf = bytearray(5)
+        self._state_mv = memoryview(self._state_buf)
+        self.file = _THIS_FILE
+        raw_data = "[]"
+        if self.file:
+            try:
+                with open(self.file, "r") as file:
+                    file.readline()
+                    raw_data = file.readline().strip()
+            except OSError:
+                # Frozen module or unreadable path: run without persistence.
+                self.file = None
         try:
-            self.cal_data = eval(raw_data)
-        except:
-            raise OSError("Calibration data is corrupted. Replace second line with '[]' to reset.")
+            self.cal_data = json.loads(raw_data)
+        except ValueError:
+            try:
+                # Older versions stored the Python repr; its single quotes are
+                # the only difference from JSON for this data.
+                self.cal_data = json.loads(raw_data.replace("'", '"'))
+            except ValueError:
+                raise OSError("Calibration data is corrupted. Replace second line with '[]' to reset.")
 
         if self.cal_data == []:
             self.calibrate()
@@ -72,14 +80,15 @@ class Joystick:
         """Return True if the joystick button is pressed."""
         return self.btn.value() == 0
 
-    @micropython.native
     async def button_waiter(self):
         """
         Wait asynchronously until the joystick button is released.
 
+        Sleeps on the button edge IRQ instead of polling, so no CPU is
+        spent while the button state doesn't change.
         """
         while self.button():
-            await asyncio.sleep_ms(self.at)
+            await self._btn_flag.wait()
 
     def calibrate(self):
         """
@@ -94,8 +103,8 @@ class Joystick:
             aval1 = self.a1.read_u16()
             aval2 = self.a2.read_u16()
 
-            diff1 = abs(32767.5 - aval1)
-            diff2 = abs(32767.5 - aval2)
+            diff1 = abs(_MID_RAW - aval1)
+            diff2 = abs(_MID_RAW - aval2)
             if diff1 > diff2:
                 data, axis = aval1, 1
             else:
@@ -106,13 +115,23 @@ class Joystick:
             else:
                 self.cal_data.append([direction, axis, data])
 
+        if self.file is None:
+            print(f"Couldn't change file (module is frozen or read-only), please manually insert this on the second line: '{json.dumps(self.cal_data)}'")
+            return
+
         try:
-            with open(self.file, "r") as file:
-                lines = file.readlines()
-            lines[1] = f'{self.cal_data}\n'
-            with open(self.file, "w") as file:
-                for line in lines:
-                    file.write(line)
+            tmp = self.file + ".tmp"
+            with open(self.file, "rb") as src, open(tmp, "wb") as dst:
+                dst.write(src.readline())  # keep line 1 (the marker comment)
+                src.readline()  # skip the old calibration line
+                dst.write(json.dumps(self.cal_data).encode() + b"\n")
+                while True:
+                    buf = src.read(512)
+                    if not buf:
+                        break
+                    dst.write(buf)
+            os.remove(self.file)
+            os.rename(tmp, self.file)
         except Exception as error:
             print(f"Couldn't change file ({error}), please manually insert this on the second line: '{self.cal_data}'")
 
@@ -124,17 +143,17 @@ class Joystick:
             data (list): Calibration data from second line of this file.
         """
 
-        p_over = round((100 + self.deadzone) / 100,2)
-        p_under = round((100 - self.deadzone) / 100,2)
+        over = _PCT + self.deadzone
+        under = _PCT - self.deadzone
 
         self.middle1 = data[0][2]
-        self.middle1_range = [round(self.middle1 * p_under), self.middle1, round(self.middle1 * p_over)]
+        self.mid1_lo = self.middle1 * under // _PCT
+        self.mid1_hi = self.middle1 * over // _PCT
 
         self.middle2 = data[0][4]
-        self.middle2_range = [round(self.middle2 * p_under), self.middle2, round(self.middle2 * p_over)]
+        self.mid2_lo = self.middle2 * under // _PCT
+        self.mid2_hi = self.middle2 * over // _PCT
 
-        self.middle = [self.middle1_range, self.middle2_range]
-        
         self.leftval = data[1][2]
         self.leftaxis = data[1][1]
 
@@ -147,6 +166,51 @@ class Joystick:
         self.downval = data[4][2]
         self.downaxis = data[4][1]
 
+        self._left = self._dir_config(self.leftaxis, self.leftval)
+        self._right = self._dir_config(self.rightaxis, self.rightval)
+        self._up = self._dir_config(self.upaxis, self.upval)
+        self._down = self._dir_config(self.downaxis, self.downval)
+        self._dirs = (self._up, self._down, self._right, self._left)
+
+    def _dir_config(self, axis, maxval):
+        """
+        Precompute the conversion constants for one direction.
+
+        Args:
+            axis (int): Axis number (1 or 2).
+            maxval (int): Calibration value for the direction.
+
+        Returns:
+            tuple: (axis, mid_lo, mid_hi, d_pos, d_neg, read) where the d
+            values are the count spans for either side of the center and
+            read is the bound read_u16 of the direction's ADC.
+        """
+        if axis == 1:
+            mid_lo, mid_hi, read = self.mid1_lo, self.mid1_hi, self._r1
+        else:
+            mid_lo, mid_hi, read = self.mid2_lo, self.mid2_hi, self._r2
+        return (axis, mid_lo, mid_hi, maxval - mid_hi, mid_lo - maxval, read)
+
+    @micropython.viper
+    def _read_avg(self, read) -> int:
+        """
+        Average self.samples calls of a bound ADC read function.
+
+        Args:
+            read (callable): Bound read_u16 of the ADC to sample.
+
+        Returns:
+            int: Averaged ADC value.
+        """
+        n = int(self.samples)
+        s = 0
+        for _ in range(n):
+            s += int(read())
+        sh = int(self._samp_shift)
+        if sh >= 0:
+            return (s + (n >> 1)) >> sh
+        return (s + n // 2) // n
+
     @micropython.native
     def axis_reader(self, axis):
         """
@@ -158,56 +222,101 @@ class Joystick:
         Returns:
             int: Averaged ADC value.
         """
-        adc = self.a1 if axis == 1 else self.a2
-        return round(sum(adc.read_u16() for _ in range(self.samples)) / self.samples)
+        return self._read_avg(self._r1 if axis == 1 else self._r2)
+
+    @micropython.native
+    def _sample_both(self):
+        """Read both axes once and return their averaged values."""
+        return self._read_avg(self._r1), self._read_avg(self._r2)
 
     @micropython.native
-    def converter(self, axis, maxval):
+    def _convert_val(self, val, cfg):
         """
-        Convert analog input into percent offset from center.
+        Convert an already-read averaged value into percent offset from center.
 
         Args:
-            axis (int): Axis number (1 or 2).
-            maxval (int): Calibration value for the direction.
+            val (int): Averaged ADC value for the direction's axis.
+            cfg (tuple): Precomputed direction constants from _dir_config.
 
         Returns:
             int: Percentage from center (0–100).
         """
-        val = self.axis_reader(axis)
-        mid1 = self.middle[axis - 1][0]
-        mid2 = self.middle[axis - 1][2]
-
-        if val > mid2:
-            percent = (val - mid2) / (maxval - mid2) * 100
-        elif val < mid1:
-            percent = (mid1 - val) / (mid1 - maxval) * 100
+        if val > cfg[2]:
+            d = cfg[3]
+            percent = ((val - cfg[2]) * _PCT + (d >> 1)) // d
+        elif val < cfg[1]:
+            d = cfg[4]
+            percent = ((cfg[1] - val) * _PCT + (d >> 1)) // d
         else:
             return 0
 
-        return round(min(100, max(0, percent)))
+        if percent > _PCT:
+            return _PCT
+        return percent if percent > 0 else 0
+
+    @micropython.native
+    def _eval_all(self):
+        """Sample both axes once and return (up, down, right, left) percents."""
+        v1, v2 = self._sample_both()
+        up, down, right, left = self._dirs
+        return (
+            self._convert_val(v1 if up[0] == 1 else v2, up),
+            self._convert_val(v1 if down[0] == 1 else v2, down),
+            self._convert_val(v1 if right[0] == 1 else v2, right),
+            self._convert_val(v1 if left[0] == 1 else v2, left),
+        )
+
+    @micropython.native
+    def converter(self, cfg):
+        """
+        Convert analog input into percent offset from center.
+
+        Args:
+            cfg (tuple): Precomputed direction constants from _dir_config.
+
+        Returns:
+            int: Percentage from center (0–100).
+        """
+        return self._convert_val(self._read_avg(cfg[5]), cfg)
+
+    @micropython.native
+    def _up_pct(self):
+        """Percent for up, without the kwarg dispatch of up()."""
+        return self.converter(self._up)
+
+    @micropython.native
+    def _down_pct(self):
+        """Percent for down, without the kwarg dispatch of down()."""
+        return self.converter(self._down)
 
     @micropython.native
+    def _right_pct(self):
+        """Percent for right, without the kwarg dispatch of right()."""
+        return self.converter(self._right)
+
+    @micropython.native
+    def _left_pct(self):
+        """Percent for left, without the kwarg dispatch of left()."""
+        return self.converter(self._left)
+
     def up(self, percent=False):
         """Return True/percent if joystick is pushed up."""
-        p = self.converter(self.upaxis, self.upval)
+        p = self._up_pct()
         return p if percent else p > 50
 
-    @micropython.native
     def down(self, percent=False):
         """Return True/percent if joystick is pushed down."""
-        p = self.converter(self.downaxis, self.downval)
+        p = self._down_pct()
         return p if percent else p > 50
 
-    @micropython.native
     def right(self, percent=False):
         """Return True/percent if joystick is pushed right."""
-        p = self.converter(self.rightaxis, self.rightval)
+        p = self._right_pct()
         return p if percent else p > 50
 
-    @micropython.native
     def left(self, percent=False):
         """Return True/percent if joystick is pushed left."""
-        p = self.converter(self.leftaxis, self.leftval)
+        p = self._left_pct()
         return p if percent else p > 50
 
     @micropython.native
@@ -221,31 +330,57 @@ class Joystick:
         Returns:
             str or list: Direction name or [name, percent].
         """
-        directions = []
-        for direction in ["up", "down", "right", "left"]:
-            method = getattr(self, direction)
-            directions.append([direction, method(True)])
-        directions.sort(key=lambda x: x[1], reverse=True)
-        if directions[0][1] == 0:
+        bu, bd, br, bl = self._eval_all()
+        best_name, best_p = "up", bu
+        if bd > best_p:
+            best_name, best_p = "down", bd
+        if br > best_p:
+            best_name, best_p = "right", br
+        if bl > best_p:
+            best_name, best_p = "left", bl
+        if best_p == 0:
             return None
         if as_bool:
-            return directions[0][0] if directions[0][1] > 50 else None
+            return best_name if best_p > 50 else None
         else:
-            return directions[0]
+            return [best_name, best_p]
 
     @micropython.native
     def get_all_states(self):
         """
         Return a list of all directions and button states with percent values.
 
+        The same list object is reused on every call to avoid per-poll
+        allocation, so copy it if you need to keep it between calls.
+
         Returns:
             list: List of [direction, value] pairs.
         """
-        directions = [["button", self.button()]]
-        for direction in ["up", "down", "right", "left"]:
-            method = getattr(self, direction)
-            directions.append([direction, method(True)])
-        return directions
+        states = self._states
+        buf = self.get_all_states_raw()
+        states[0][1] = buf[0] == 1
+        states[1][1] = buf[1]
+        states[2][1] = buf[2]
+        states[3][1] = buf[3]
+        states[4][1] = buf[4]
+        return states
+
+    @micropython.native
+    def get_all_states_raw(self):
+        """
+        Fill the reused 5-byte state buffer and return it as a memoryview.
+
+        Index order is (button, up, down, right, left); direction values
+        are 0-100 and the button is 0 or 1. The same buffer is reused on
+        every call, so copy it if you need to keep it between calls.
+
+        Returns:
+            memoryview: View of the current states.
+        """
+        buf = self._state_buf
+        buf[0] = 1 if self.button() else 0
+        buf[1], buf[2], buf[3], buf[4] = self._eval_all()
+        return self._state_mv
 
     @micropython.native
     def get(self, as_bool=True):
@@ -268,19 +403,29 @@ class Joystick:
         """
         Wait asynchronously until joystick input is detected.
 
+        While the stick stays idle the polling delay backs off from
+        async_timeout up to 40 ms (or async_timeout if that is larger)
+        and snaps back to async_timeout on any input.
+
         Args:
             as_bool (bool): Whether to return bool or percent.
 
         Returns:
             str or list: Detected direction or "button".
         """
+        cap = self.at if self.at > 40 else 40
         val = None
         while not val:
             if self.button():
                 val = "button"
             else:
                 val = self.max_direction(as_bool)
-            await asyncio.sleep_ms(self.at)
+            if val:
+                self._idle_polls = 0
+            else:
+                self._idle_polls += 1
+            delay = self.at * (1 + self._idle_polls // 4)
+            await asyncio.sleep_ms(delay if delay < cap else cap)
         return val
 
 if __name__ == "__main__":